@@ -0,0 +1,89 @@
+"""Concurrent dispatch of prompts to several language model providers.
+
+Agents hold a prioritised list of providers (typically OpenAI then Deepseek).
+Calling them one after another means a slow or failing primary adds its full
+timeout to every fallback. ``first_answer`` instead runs the providers on a
+shared thread pool and hedges: the next provider is started as soon as the
+previous one fails or has been silent for ``hedge_delay`` seconds, and the
+first acceptable answer wins. An optional overall ``timeout`` lets callers
+give up early and use a local fallback instead of waiting on slow providers.
+Callers with a tight budget can pass their own ``executor`` so that calls
+they abandon never hold up the shared pool.
+"""
+
+from __future__ import annotations
+
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Optional, Sequence, TypeVar
+
+# Seconds to wait on a provider before also starting the next one
+HEDGE_DELAY = 3.0
+
+_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="llm-dispatch")
+
+T = TypeVar("T")
+
+
+def _result(future: Future) -> Optional[T]:
+    try:
+        return future.result()
+    except Exception:
+        return None
+
+
+def first_answer(
+    calls: Sequence[Callable[[], Optional[T]]],
+    accept: Callable[[T], bool] = lambda answer: bool(answer.strip()),
+    hedge_delay: float = HEDGE_DELAY,
+    timeout: Optional[float] = None,
+    executor: Optional[ThreadPoolExecutor] = None,
+) -> Optional[T]:
+    """Return the first acceptable answer from a prioritised list of providers.
+
+    Args:
+        calls: Zero-argument callables, highest priority first. Each returns
+            the provider's answer or ``None`` on failure. Answers are usually
+            strings, but any value works given a matching ``accept``.
+        accept: Predicate deciding whether a non-empty answer is usable. The
+            default accepts strings that are not blank.
+        hedge_delay: Seconds to wait on the running providers before
+            starting the next one. ``0`` races all providers at once.
+        timeout: Overall budget in seconds, or ``None`` to wait for every
+            provider. Providers still running when it expires are abandoned.
+        executor: Pool to run the providers on; the shared pool by default.
+
+    Returns:
+        The accepted answer, preferring higher priority providers when several
+        finish together, or ``None`` if every provider failed or the budget
+        ran out.
+    """
+    executor = executor or _EXECUTOR
+    deadline = None if timeout is None else time.monotonic() + timeout
+    remaining = list(enumerate(calls))
+    pending: Dict[Future, int] = {}
+    while remaining or pending:
+        if remaining:
+            index, call = remaining.pop(0)
+            pending[executor.submit(call)] = index
+        wait_for = hedge_delay if remaining else None
+        if deadline is not None:
+            left = deadline - time.monotonic()
+            if left <= 0:
+                break
+            wait_for = left if wait_for is None else min(wait_for, left)
+        done, _ = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+        for future in sorted(done, key=pending.__getitem__):
+            del pending[future]
+            answer = _result(future)
+            if answer and accept(answer):
+                _abandon(pending)
+                return answer
+    _abandon(pending)
+    return None
+
+
+def _abandon(pending: Dict[Future, int]) -> None:
+    # Queued calls are dropped; running ones finish in the background
+    for future in pending:
+        future.cancel()
@@ -0,0 +1,62 @@
+"""Helpers for recalling entities mentioned earlier in a conversation.
+
+Agents need part and model numbers that the user may have given several turns
+ago. Rather than re-joining and re-scanning the whole history on every turn,
+values found are remembered on the context dictionary and only the current
+query is scanned; the recent history is consulted only when nothing has been
+remembered yet. Even then the work per turn is bounded: only the last few
+messages are scanned, newest first, one at a time, so no joined copy of the
+history is ever built and the scan stops at the most recent mention.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, Optional
+
+# Number of most recent messages scanned when nothing is remembered yet
+HISTORY_WINDOW = 6
+
+PART_NUMBER_KEY = "_last_part_number"
+MODEL_KEY = "_last_model"
+
+
+def append_message(context: Dict[str, Any], role: str, content: str) -> None:
+    """Add a message to the conversation history."""
+    context.setdefault("history", []).append({"role": role, "content": content})
+
+
+def _find_recent(context: Dict[str, Any], find: Callable[[str], Optional[str]]) -> Optional[str]:
+    # Newest first, so the latest mention wins and older messages are skipped
+    for msg in reversed(context.get("history", [])[-HISTORY_WINDOW:]):
+        value = find(msg.get("content", ""))
+        if value is not None:
+            return value
+    return None
+
+
+def recall(
+    context: Dict[str, Any],
+    key: str,
+    query: str,
+    find: Callable[[str], Optional[str]],
+) -> Optional[str]:
+    """Find a value in the query, falling back to what the conversation gave.
+
+    Args:
+        context: Conversation state; the value found is stored under ``key``.
+        key: Context key used to remember the value between turns.
+        query: The current user message.
+        find: Extracts the value from a piece of text, or returns ``None``.
+
+    Returns:
+        The value from the query if present, otherwise the remembered value,
+        otherwise the most recent value found in the conversation history.
+    """
+    value = find(query)
+    if value is None:
+        value = context.get(key)
+    if value is None:
+        value = _find_recent(context, find)
+    if value is not None:
+        context[key] = value
+    return value
@@ -0,0 +1,66 @@
+"""Shared HTTP client for outbound API calls.
+
+Agents that talk to remote services (OpenAI, Deepseek, PartSelect) reuse a
+single process-wide client so that TCP and TLS connections are kept alive and
+pooled across calls instead of being re-established for every request.
+
+When ``httpx`` with HTTP/2 support is installed the client speaks HTTP/2, so
+concurrent calls to the same host (e.g. racing providers) are multiplexed over
+one connection. Otherwise a ``requests.Session`` is used. Both expose the
+``get``/``post`` calls and response attributes the agents rely on. Either
+library is imported on first use so that processes which never call out
+(e.g. when the local catalogue answers everything) do not pay for it.
+Failed connection attempts are retried a couple of times before giving up.
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Any
+
+POOL_CONNECTIONS = 10
+POOL_MAXSIZE = 10
+MAX_CONNECTIONS = 50
+MAX_KEEPALIVE_CONNECTIONS = 20
+MAX_RETRIES = 2
+RETRY_BACKOFF = 0.1
+# Default per-request timeout; callers with a tighter budget pass their own
+REQUEST_TIMEOUT = 10
+
+
+@lru_cache(maxsize=1)
+def get_session() -> Any:
+    """Return the shared keep-alive client, creating it on first use."""
+    try:
+        return _httpx_client()
+    except ImportError:
+        return _requests_session()
+
+
+def _httpx_client() -> Any:
+    import httpx
+
+    # Raises ImportError when the optional h2 package is missing
+    transport = httpx.HTTPTransport(
+        http2=True,
+        retries=MAX_RETRIES,
+        limits=httpx.Limits(
+            max_connections=MAX_CONNECTIONS,
+            max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+        ),
+    )
+    return httpx.Client(transport=transport, timeout=REQUEST_TIMEOUT)
+
+
+def _requests_session() -> Any:
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    session = requests.Session()
+    # Only idempotent requests are retried, so provider POSTs are never repeated
+    retries = Retry(total=MAX_RETRIES, backoff_factor=RETRY_BACKOFF)
+    adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, max_retries=retries)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
@@ -8,33 +8,67 @@ keyword search is sufficient for this case study.
 
 from __future__ import annotations
 
-import re
-from typing import Any, Dict
+from functools import lru_cache
+from typing import Any, Dict, Tuple
 
 from .base_agent import BaseAgent
+from .patterns import PART_RE
 
 
 class IntentClassifier(BaseAgent):
     """Identify the user’s intent from their query."""
 
-    PART_NUMBER_PATTERN = re.compile(r"\b(?:PS\d+|WP[\w\d]+|W\d{5,})\b", re.IGNORECASE)
+    PART_NUMBER_PATTERN = PART_RE
+    # Substring keywords per intent, in priority order
+    INTENT_KEYWORDS: Tuple[Tuple[str, Tuple[str, ...]], ...] = (
+        # Installation/repair/troubleshooting questions
+        ("installation", (
+            "install", "installation", "fix", "repair", "replace", "broken", "not working",
+            "issue", "problem", "troubleshoot", "how to",
+        )),
+        ("compatibility", ("compatible", "fit", "model", "work with")),
+        ("order_support", ("order", "return", "refund", "track", "shipping", "delivery")),
+        # Also chosen when the query contains a part number
+        ("product_info", ("part", "parts", "find", "search", "looking for")),
+    )
 
     def handle(self, query: str, context: Dict[str, Any]) -> Dict[str, Any]:
-        q = query.lower()
-
-        # Check for installation/repair/troubleshooting questions
-        if any(keyword in q for keyword in ["install", "installation", "fix", "repair", "replace", "broken", "not working", "issue", "problem", "troubleshoot", "how to"]):
-            intent = "installation"
-        # Check for compatibility questions
-        elif any(keyword in q for keyword in ["compatible", "fit", "model", "work with"]):
-            intent = "compatibility"
-        # Check for order‑related questions
-        elif any(keyword in q for keyword in ["order", "return", "refund", "track", "shipping", "delivery"]):
-            intent = "order_support"
-        # Check for product information (presence of part number or general part query)
-        elif self.PART_NUMBER_PATTERN.search(query) or any(keyword in q for keyword in ["part", "parts", "find", "search", "looking for"]):
-            intent = "product_info"
-        else:
-            intent = "general"
-
-        return {"response": intent, "intent": intent}
\ No newline at end of file
+        intent = self.classify(query.lower())
+        return {"response": intent, "intent": intent}
+
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def classify(q: str) -> str:
+        """Return the highest priority intent whose keywords occur in a lower-cased query.
+
+        Categories are tested in priority order and the first hit wins, so most
+        queries stop after a few substring checks. Results are memoised.
+        """
+        for intent, keywords in IntentClassifier.INTENT_KEYWORDS:
+            if any(keyword in q for keyword in keywords):
+                return intent
+        # product_info, the last category, also covers bare part numbers
+        if IntentClassifier.PART_NUMBER_PATTERN.search(q):
+            return "product_info"
+        return "general"
+
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def score(q: str) -> Tuple[str, float]:
+        """Return the intent for a lower-cased query and a confidence in it.
+
+        The intent is the one :meth:`classify` picks. Confidence is the share
+        of all keyword hits that belong to that category: 1.0 when only one
+        category fires, lower when the query also matches other intents, and
+        0.0 when nothing matched. Unlike :meth:`classify` this checks every
+        keyword, so it is only used where the confidence is needed.
+        """
+        hits = [len([keyword for keyword in keywords if keyword in q])
+                for _, keywords in IntentClassifier.INTENT_KEYWORDS]
+        if IntentClassifier.PART_NUMBER_PATTERN.search(q):
+            hits[-1] += 1
+        total = sum(hits)
+        for (intent, _), count in zip(IntentClassifier.INTENT_KEYWORDS, hits):
+            if count:
+                return intent, count / total
+        return "general", 0.0
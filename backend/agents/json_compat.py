@@ -0,0 +1,29 @@
+"""JSON decoding that prefers ``orjson`` when it is installed.
+
+``orjson`` parses several times faster than the standard library and reads
+bytes directly, avoiding a separate UTF-8 decode. When it is not available
+the standard ``json`` module is used, so callers never need to care.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Deserialise a JSON document from bytes or text."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def load_file(path: str) -> Any:
+    """Read and deserialise the JSON file at ``path``."""
+    with open(path, "rb") as f:
+        return loads(f.read())
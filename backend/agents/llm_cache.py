@@ -0,0 +1,54 @@
+"""Response cache for language model calls.
+
+Deterministic prompts such as the intent classification template are sent
+over and over with identical content. ``LLMCache`` stores the answers of
+such calls keyed by a SHA-256 digest of the request so that repeats skip the
+API entirely. Only requests made with ``temperature == 0`` are cached, as
+sampled answers are not meant to be reused.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from typing import Any, Dict, List, Optional
+
+from cachetools import TTLCache
+
+
+class LLMCache:
+    """Thread-safe TTL cache of language model answers."""
+
+    def __init__(self, maxsize: int = 2048, ttl: float = 3600) -> None:
+        self._cache: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def cache_key(model: str, messages: List[Dict[str, Any]], temperature: float) -> str:
+        payload = {"model": model, "messages": messages, "temperature": float(temperature)}
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def get(self, model: str, messages: List[Dict[str, Any]], temperature: float) -> Optional[str]:
+        """Return the cached answer for a request, or ``None`` on a miss."""
+        if temperature != 0:
+            return None
+        key = self.cache_key(model, messages, temperature)
+        with self._lock:
+            return self._cache.get(key)
+
+    def put(self, model: str, messages: List[Dict[str, Any]], temperature: float, answer: str) -> None:
+        """Store the answer for a deterministic request."""
+        if temperature != 0:
+            return
+        key = self.cache_key(model, messages, temperature)
+        with self._lock:
+            self._cache[key] = answer
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+
+# Shared by all provider agents; the model name keeps their entries apart
+RESPONSE_CACHE = LLMCache()
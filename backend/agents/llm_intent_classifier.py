@@ -3,30 +3,55 @@
 This agent uses either the OpenAI API or the Deepseek API to classify user
 queries into one of several predefined intents. It sends a prompt to the
 language model asking it to respond with a single word indicating the
-intent. Fallback to the keyword classifier if LLM calls fail.
+intent. The keyword classifier is consulted first and its answer is used
+directly when it is confident; it is also the fallback if LLM calls fail.
 """
 
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from typing import Any, Dict, Optional
 
 from .base_agent import BaseAgent
+from .dispatch import first_answer
 from .openai_agent import OpenAIAgent
 from .deepseek_agent import DeepSeekAgent
 from .intent_classifier import IntentClassifier  # for fallback
 
+# Classification races run on their own pool so that calls abandoned at the
+# budget never queue ahead of the shared pool's installation and general queries
+_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="intent-dispatch")
+
 
 class LLMIntentClassifier(BaseAgent):
     """Use a language model to determine the user’s intent."""
 
     INTENTS = ["product_info", "compatibility", "installation", "order_support", "general"]
 
-    def __init__(self, openai_agent: Optional[OpenAIAgent] = None, deepseek_agent: Optional[DeepSeekAgent] = None) -> None:
+    # Seconds to wait for any provider before using the keyword classifier
+    PRIMARY_BUDGET = 2.5
+    # Keyword results at least this confident are used without an LLM call
+    CONFIDENCE_THRESHOLD = 0.8
+
+    def __init__(
+        self,
+        openai_agent: Optional[OpenAIAgent] = None,
+        deepseek_agent: Optional[DeepSeekAgent] = None,
+        primary_budget: float = PRIMARY_BUDGET,
+    ) -> None:
         self.openai_agent = openai_agent or OpenAIAgent()
         self.deepseek_agent = deepseek_agent or DeepSeekAgent()
         self.fallback_classifier = IntentClassifier()
+        self.primary_budget = primary_budget
 
     def handle(self, query: str, context: Dict[str, Any]) -> Dict[str, Any]:
+        # Unambiguous keyword matches need no network round-trip
+        intent, confidence = self.fallback_classifier.score(query.lower())
+        local = {"response": intent, "intent": intent, "confidence": confidence}
+        if confidence >= self.CONFIDENCE_THRESHOLD:
+            return local
+
         prompt = (
             "You are an intent classification engine for an e‑commerce appliance parts chatbot. "
             "Given a user query, respond with one of the following intent labels: "
@@ -34,16 +59,29 @@ class LLMIntentClassifier(BaseAgent):
             "Return only the label without any explanation. "
             f"Query: {query}"
         )
-        # Try OpenAI first
-        answer = self.openai_agent.call(prompt)
-        if answer is None:
-            answer = self.deepseek_agent.call(prompt)
+        # Race both providers and take the first valid label within the budget.
+        # Greedy decoding keeps labels deterministic so repeats hit the cache,
+        # and requests time out with the budget so abandoned calls free their
+        # workers instead of waiting out the full HTTP timeout.
+        answer = first_answer(
+            [
+                partial(self.openai_agent.call, prompt, temperature=0.0, timeout=self.primary_budget),
+                partial(self.deepseek_agent.call, prompt, temperature=0.0, timeout=self.primary_budget),
+            ],
+            accept=lambda a: self._parse_intent(a) is not None,
+            hedge_delay=0.0,
+            timeout=self.primary_budget,
+            executor=_EXECUTOR,
+        )
         if answer:
-            intent = answer.strip().split()[0].lower()
-            if intent not in self.INTENTS:
-                # Unexpected response; fallback
-                fallback = self.fallback_classifier.handle(query, context)
-                intent = fallback.get("intent")
+            intent = self._parse_intent(answer)
             return {"response": intent, "intent": intent, "source": "llm"}
-        # Fallback to keyword classifier
-        return self.fallback_classifier.handle(query, context)
\ No newline at end of file
+        # No provider answered in time; fall back to the keyword classifier
+        return local
+
+    def _parse_intent(self, answer: str) -> Optional[str]:
+        """Return the intent label in an LLM answer, or ``None`` if it has none."""
+        words = answer.strip().split()
+        if words and words[0].lower() in self.INTENTS:
+            return words[0].lower()
+        return None
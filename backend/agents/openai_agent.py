@@ -8,11 +8,13 @@ key is not available or the request fails, the ``call`` method returns
 
 from __future__ import annotations
 
-import json
 import os
 from typing import Any, Dict, Optional
 
-import requests
+from .http_client import REQUEST_TIMEOUT, get_session
+from .json_compat import loads
+from .llm_cache import RESPONSE_CACHE
+from .prompts import PROMPT_CACHE_KEY, SYSTEM_PROMPT
 
 
 class OpenAIAgent:
@@ -23,26 +25,33 @@ class OpenAIAgent:
         self.model = model
         self.endpoint = "https://api.openai.com/v1/chat/completions"
 
-    def call(self, prompt: str) -> Optional[str]:
+    def call(self, prompt: str, temperature: float = 0.2, timeout: float = REQUEST_TIMEOUT) -> Optional[str]:
         if not self.api_key:
             return None
         headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
         }
+        messages = [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt},
+        ]
+        cached = RESPONSE_CACHE.get(self.model, messages, temperature)
+        if cached is not None:
+            return cached
         payload: Dict[str, Any] = {
             "model": self.model,
-            "messages": [
-                {"role": "system", "content": "You are a helpful assistant specialised in appliance parts."},
-                {"role": "user", "content": prompt},
-            ],
-            "temperature": 0.2,
+            "messages": messages,
+            "temperature": temperature,
+            "prompt_cache_key": PROMPT_CACHE_KEY,
         }
         try:
-            response = requests.post(self.endpoint, headers=headers, data=json.dumps(payload), timeout=10)
+            response = get_session().post(self.endpoint, headers=headers, json=payload, timeout=timeout)
             if response.status_code == 200:
-                result = response.json()
-                return result["choices"][0]["message"]["content"].strip()
+                result = loads(response.content)
+                answer = result["choices"][0]["message"]["content"].strip()
+                RESPONSE_CACHE.put(self.model, messages, temperature, answer)
+                return answer
         except Exception:
             pass
         return None
\ No newline at end of file
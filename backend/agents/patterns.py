@@ -0,0 +1,64 @@
+"""Precompiled text patterns shared by the agents.
+
+Part and model number patterns live here so that every agent uses the same
+compiled instance. They are compiled with the third-party ``regex`` module
+when it is installed, which supports possessive quantifiers and keeps the
+model pattern linear-time; otherwise the standard ``re`` module is used. The
+part number pattern, which every part lookup runs, uses Google's RE2 engine
+for guaranteed linear-time DFA matching if ``google-re2`` is installed. It is
+left out of requirements.txt because it needs a native build.
+"""
+
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+try:
+    import regex
+except ImportError:  # pragma: no cover - optional dependency
+    regex = None
+
+try:
+    import re2
+except ImportError:  # pragma: no cover - optional dependency
+    re2 = None
+
+_engine = regex or re
+
+# PartSelect numbers (PS…), Whirlpool numbers (WP…) and bare W numbers
+PART_SOURCE = r"\b(?:PS\d+|WP[\w\d]+|W\d{5,})\b"
+# Tokens that contain at least one digit, typical for appliance model numbers.
+# Possessive quantifiers need the regex module; stdlib re may backtrack.
+MODEL_SOURCE = r"\b[A-Z]*+\d++[A-Z0-9]*+\b" if regex is not None else r"\b[A-Z]*\d+[A-Z0-9]*\b"
+
+if re2 is not None:
+    PART_RE = re2.compile(f"(?i)({PART_SOURCE})")
+else:
+    PART_RE = _engine.compile(f"({PART_SOURCE})", _engine.IGNORECASE)
+MODEL_RE = _engine.compile(MODEL_SOURCE, _engine.IGNORECASE)
+
+# Part numbers also look like model tokens, so they are tried first
+ENTITY_RE = _engine.compile(f"(?P<part>{PART_SOURCE})|(?P<model>{MODEL_SOURCE})", _engine.IGNORECASE)
+
+
+def find_part_number(text: str) -> Optional[str]:
+    """Return the first part number mentioned in ``text``, if any."""
+    match = PART_RE.search(text)
+    return match.group(1) if match else None
+
+
+@lru_cache(maxsize=256)
+def find_entities(text: str) -> Tuple[Optional[str], Optional[str]]:
+    """Return the first part number and first model number in ``text``.
+
+    Both are found in a single pass over the text. A token that looks like a
+    part number is never reported as the model.
+    """
+    found: Dict[str, str] = {}
+    for match in ENTITY_RE.finditer(text):
+        found.setdefault(match.lastgroup, match.group(0))
+        if len(found) == 2:
+            break
+    return found.get("part"), found.get("model")
@@ -9,12 +9,55 @@ product discovery in the PartSelect catalogue.
 
 from __future__ import annotations
 
-import json
+import logging
 import os
 import re
-from typing import Any, Dict, List, Optional
+import threading
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Pattern
+
+from cachetools import TTLCache
 
 from .base_agent import BaseAgent
+from .history import PART_NUMBER_KEY, recall
+from .json_compat import load_file, loads
+from .patterns import PART_RE, find_part_number
+
+logger = logging.getLogger(__name__)
+
+# Fields returned for a part, whichever source it came from
+_PART_KEYS = ("part_number", "name", "description", "model_compatibility", "installation", "image_url")
+_CATALOGUE_FIELD_MAP = {key: key for key in _PART_KEYS}
+# PartSelect API field that supplies each returned field
+_API_FIELD_MAP = {
+    **_CATALOGUE_FIELD_MAP,
+    "model_compatibility": "models",
+    "installation": "installation_instructions",
+}
+
+
+def _pack(record: Dict[str, Any], field_map: Dict[str, str] = _CATALOGUE_FIELD_MAP) -> Dict[str, Any]:
+    """Build the response fields for a part from a catalogue or API record."""
+    packed = {key: record.get(source) for key, source in field_map.items()}
+    if field_map["model_compatibility"] not in record:
+        packed["model_compatibility"] = []
+    return packed
+
+
+# Parts API results rarely change, so successful lookups are reused for an hour
+API_CACHE_TTL = 3600
+_api_cache: TTLCache = TTLCache(maxsize=1024, ttl=API_CACHE_TTL)
+_api_cache_lock = threading.Lock()
+
+
+def _create_vector_store(product_file: str) -> Any:
+    # The app runs from backend/ with ``agents`` as a top-level package;
+    # the relative form covers importing ``backend`` itself as a package
+    try:
+        from vector_store import create_vector_store
+    except ImportError:
+        from ..vector_store import create_vector_store
+    return create_vector_store(product_file)
 
 
 class ProductSearchAgent(BaseAgent):
@@ -31,7 +74,7 @@ class ProductSearchAgent(BaseAgent):
     constructs a vector store for advanced semantic search capabilities.
     """
 
-    PART_PATTERN = re.compile(r"\b(PS\d+|WP[\w\d]+|W\d{5,})\b", re.IGNORECASE)
+    PART_PATTERN = PART_RE
 
     def __init__(self, data_path: Optional[str] = None, use_vector: bool = False) -> None:
         """
@@ -47,60 +90,102 @@ class ProductSearchAgent(BaseAgent):
         base_dir = os.path.dirname(os.path.dirname(__file__))
         self.data_file = data_path or os.path.join(base_dir, "data", "products.json")
         self.catalogue: List[Dict[str, Any]] = []
+        self._by_part: Dict[str, Dict[str, Any]] = {}
+        self._keyword_rank: Dict[str, int] = {}
+        self._keyword_pattern: Optional[Pattern[str]] = None
         self._load_catalogue()
-        # Initialise vector store if requested
-        self.vector_store = None
-        if use_vector:
-            try:
-                from ..vector_store import VectorStore
-                self.vector_store = VectorStore(self.data_file)
-            except Exception:
-                # If vector store initialisation fails, silently continue without it
-                self.vector_store = None
+        # The vector store is built lazily on the first semantic search
+        self._use_vector = use_vector
+        self._vector_store = None
+        self._vector_lock = threading.Lock()
+
+    @property
+    def vector_store(self):
+        """Semantic search index, built on first access if enabled."""
+        if self._vector_store is None and self._use_vector:
+            with self._vector_lock:
+                if self._vector_store is None and self._use_vector:
+                    try:
+                        self._vector_store = _create_vector_store(self.data_file)
+                    except Exception as e:
+                        # Keyword and part-number search still work without it
+                        logger.warning("Semantic search disabled: %s", e)
+                        self._use_vector = False
+        return self._vector_store
 
     def _load_catalogue(self) -> None:
         if os.path.exists(self.data_file):
-            with open(self.data_file, "r", encoding="utf-8") as f:
-                self.catalogue = json.load(f)
+            self.catalogue = load_file(self.data_file)
+        self._normalise_items()
+        self._build_indexes()
 
-    def _find_by_part_number(self, part_number: str) -> Optional[Dict[str, Any]]:
-        part_number_upper = part_number.upper()
+    def _normalise_items(self) -> None:
+        """Cache the case-folded fields that lookups compare against.
+
+        Stored on each item under underscore-prefixed keys so the case
+        conversion happens once per catalogue load rather than per query.
+        """
         for item in self.catalogue:
-            if item["part_number"].upper() == part_number_upper or part_number_upper in [alt.upper() for alt in item.get("alt_numbers", [])]:
-                return item
-        return None
+            item["_part_upper"] = item["part_number"].upper()
+            item["_alts_upper"] = frozenset(alt.upper() for alt in item.get("alt_numbers", []))
+            item["_name_lc"] = item["name"].lower()
+            item["_models_lc"] = [model.lower() for model in item.get("model_compatibility", [])]
+            item["_compat_upper"] = frozenset(model.upper() for model in item.get("model_compatibility", []))
+
+    def _build_indexes(self) -> None:
+        """Index the catalogue by part number and by searchable keywords.
+
+        Earlier catalogue entries win when keys collide, matching the order in
+        which a linear scan would have found them. Keywords are tried in
+        catalogue order inside a lookahead, so every position reports the
+        earliest entry whose keyword starts there, even when a later entry's
+        keyword contains it. The lowest rank found is then the item a
+        linear scan would return.
+        """
+        self._by_part = {}
+        self._keyword_rank = {}
+        for rank, item in enumerate(self.catalogue):
+            self._by_part.setdefault(item["_part_upper"], item)
+            for number in item["_alts_upper"]:
+                self._by_part.setdefault(number, item)
+            for keyword in [item["_name_lc"], *item["_models_lc"]]:
+                if keyword:
+                    self._keyword_rank.setdefault(keyword, rank)
+        self._keyword_pattern = (
+            re.compile("(?=(%s))" % "|".join(map(re.escape, self._keyword_rank)))
+            if self._keyword_rank else None
+        )
+        # Memoise lookups by the raw part number and by the lowercased query so
+        # repeats skip the work; rebuilt here so a reload never serves stale items
+        self._find_cached = lru_cache(maxsize=1024)(self._lookup_part_number)
+        self._keywords_cached = lru_cache(maxsize=256)(self._match_keywords)
+
+    def _find_by_part_number(self, part_number: str) -> Optional[Dict[str, Any]]:
+        return self._find_cached(part_number)
+
+    def _lookup_part_number(self, part_number: str) -> Optional[Dict[str, Any]]:
+        return self._by_part.get(part_number.upper())
 
     def _search_by_keywords(self, query: str) -> Optional[Dict[str, Any]]:
-        q = query.lower()
-        for item in self.catalogue:
-            if item["name"].lower() in q or any(model.lower() in q for model in item.get("model_compatibility", [])):
-                return item
-        return None
+        return self._keywords_cached(query.lower())
+
+    def _match_keywords(self, query_lc: str) -> Optional[Dict[str, Any]]:
+        if self._keyword_pattern is None:
+            return None
+        ranks = [self._keyword_rank[m.group(1)] for m in self._keyword_pattern.finditer(query_lc)]
+        return self.catalogue[min(ranks)] if ranks else None
 
     def handle(self, query: str, context: Dict[str, Any]) -> Dict[str, Any]:
-        # Check conversation history for part numbers
-        history = context.get("history", [])
-        full_conversation = " ".join([msg.get("content", "") for msg in history])
-        combined_text = f"{full_conversation} {query}"
-        
-        # First attempt to identify a part number from current message or history
-        match = self.PART_PATTERN.search(combined_text)
+        # Identify a part number from the current message or the conversation
+        part_number = recall(context, PART_NUMBER_KEY, query, find_part_number)
         item: Optional[Dict[str, Any]] = None
-        if match:
-            part_number = match.group(1)
+        if part_number:
             item = self._find_by_part_number(part_number)
         if not item:
             item = self._search_by_keywords(query)
 
         if item:
-            response = {
-                "part_number": item["part_number"],
-                "name": item["name"],
-                "description": item["description"],
-                "model_compatibility": item.get("model_compatibility", []),
-                "installation": item.get("installation"),
-                "image_url": item.get("image_url"),
-            }
+            response = _pack(item)
             return {"response": response, "agent": "product_search"}
 
         # Attempt semantic search if a vector store is available and no direct match was found
@@ -110,26 +195,18 @@ class ProductSearchAgent(BaseAgent):
                 similarity, meta = results[0]
                 # Only return results with reasonable similarity threshold
                 if similarity > 0.1:
-                    response = {
-                        "part_number": meta["part_number"],
-                        "name": meta["name"],
-                        "description": meta["description"],
-                        "model_compatibility": meta.get("model_compatibility", []),
-                        "installation": meta.get("installation"),
-                        "image_url": meta.get("image_url"),
-                    }
+                    response = _pack(meta)
                     return {"response": response, "agent": "product_search", "similarity": similarity}
 
         # If everything fails, attempt to fetch from PartSelect's live API
-        api_item = self._fetch_from_partselect_api(part_number=match.group(1) if match else None)
+        api_item = self._fetch_from_partselect_api(part_number=part_number)
         if api_item:
             return {"response": api_item, "agent": "product_search", "source": "partselect_api"}
         
         # Enhanced fallback response
-        if match:
-            part_num = match.group(1)
+        if part_number:
             return {
-                "response": f"I couldn't find part number {part_num} in our current catalog. Please double-check the part number, or provide your appliance's model number so I can help you find the right part.",
+                "response": f"I couldn't find part number {part_number} in our current catalog. Please double-check the part number, or provide your appliance's model number so I can help you find the right part.",
                 "agent": "product_search"
             }
         else:
@@ -146,30 +223,46 @@ class ProductSearchAgent(BaseAgent):
 
         Returns:
             A dictionary with part details or ``None`` if the API is not configured or the call fails.
+            Successful results are cached for ``API_CACHE_TTL`` seconds.
         """
-        import os
-        import requests
         if not part_number:
             return None
         api_key = os.getenv("PARTSELECT_API_KEY")
         base_url = os.getenv("PARTSELECT_API_URL", "https://api.partselect.com")
         if not api_key:
             return None
+        key = (base_url, part_number)
+        with _api_cache_lock:
+            cached = _api_cache.get(key)
+        if cached is not None:
+            return cached
+        item = self._request_part(base_url, api_key, part_number)
+        if item is not None:
+            with _api_cache_lock:
+                _api_cache[key] = item
+        return item
+
+    @staticmethod
+    def _request_part(base_url: str, api_key: str, part_number: str) -> Optional[Dict[str, Any]]:
+        from .http_client import get_session
         try:
             url = f"{base_url}/parts/{part_number}"
             headers = {"Authorization": f"Bearer {api_key}"}
-            resp = requests.get(url, headers=headers, timeout=5)
+            resp = get_session().get(url, headers=headers, timeout=5)
             if resp.status_code == 200:
-                data = resp.json()
+                data = loads(resp.content)
                 # Map API fields into our internal representation
-                return {
-                    "part_number": data.get("part_number"),
-                    "name": data.get("name"),
-                    "description": data.get("description"),
-                    "model_compatibility": data.get("models", []),
-                    "installation": data.get("installation_instructions"),
-                    "image_url": data.get("image_url"),
-                }
+                return _pack(data, _API_FIELD_MAP)
         except Exception:
             pass
         return None
+
+
+@lru_cache(maxsize=1)
+def get_product_agent() -> ProductSearchAgent:
+    """Return the process-wide product agent with semantic search enabled.
+
+    Callers share one catalogue index and vector store rather than each
+    building their own.
+    """
+    return ProductSearchAgent(use_vector=True)
@@ -0,0 +1,25 @@
+"""Static prompt text shared by the language model agents.
+
+The system prompt is sent as the first message of every chat completion.
+Keeping it byte-for-byte identical across calls and providers lets OpenAI
+prompt caching and Deepseek context caching reuse the already processed
+prefix, which lowers time to first token and billed input tokens. Put any
+per-request detail in the user message, never here.
+"""
+
+from __future__ import annotations
+
+SYSTEM_PROMPT = (
+    "You are a helpful assistant specialised in appliance parts. "
+    "You support customers of PartSelect, an e-commerce site for replacement parts "
+    "for refrigerators and dishwashers. "
+    "Answer concisely and in a friendly tone. "
+    "When troubleshooting, give short numbered steps and mention the parts that "
+    "commonly fail. "
+    "When a model or part number is needed to give a precise answer, ask for it. "
+    "Do not invent part numbers, prices or order details. "
+    "When asked to classify or label something, reply with the label only."
+)
+
+# Groups requests that share SYSTEM_PROMPT onto the same OpenAI cache shard
+PROMPT_CACHE_KEY = "partselect-assistant-v1"
@@ -1,8 +1,42 @@
 """Enhanced fallback system using your training data."""
 
-import json
-import os
-from typing import Optional, Dict, Any
+import logging
+from typing import Optional, Dict, Any, Tuple
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from .training_data import load_training
+
+logger = logging.getLogger(__name__)
+
+# Key appliance terms that boost a match when both texts mention them
+APPLIANCE_TERMS = ('refrigerator', 'fridge', 'dishwasher', 'washing', 'machine', 'dryer',
+                   'cooling', 'cleaning', 'leaking', 'filter', 'light', 'bulb', 'water')
+APPLIANCE_BOOST = 0.15
+MATCH_THRESHOLD = 0.2
+
+# Rule-based reply categories in priority order; the first whose keywords
+# occur wins. Keywords containing a shorter one of the same rule ('water
+# filter', 'installation') are left out since they never decide a match.
+RULES = (
+    ('refrigerator', ('refrigerator', 'fridge', 'cooling', 'cold', 'temperature')),
+    ('filter', ('filter',)),
+    ('dishwasher', ('dishwasher', 'dishes', 'washing')),
+    ('installation', ('install', 'replace', 'how to')),
+    ('compatibility', ('compatible', 'fit', 'work with')),
+    ('greeting', ('help', 'hello', 'hi')),
+)
+
+
+def _match_rule(query_lower: str) -> Optional[str]:
+    """Return the first rule in priority order with a keyword in the query."""
+    # map over the bound method keeps the per-keyword test in C
+    contains = query_lower.__contains__
+    for name, keywords in RULES:
+        if any(map(contains, keywords)):
+            return name
+    return None
 
 
 class SmartFallbackSystem:
@@ -10,78 +44,74 @@ class SmartFallbackSystem:
     
     def __init__(self):
         self.training_data = self._load_training_data()
-        print(f"Loaded {len(self.training_data)} training examples for smart fallback")
+        self._build_index()
+        logger.info("Loaded %d training examples for smart fallback", len(self.training_data))
     
     def _load_training_data(self):
         """Load your training examples."""
-        training_path = "data/training_conversations.json"
-        if os.path.exists(training_path):
-            try:
-                with open(training_path, 'r') as f:
-                    return json.load(f)
-            except:
-                pass
-        return []
-    
-    def _calculate_similarity(self, query: str, training_input: str) -> float:
-        """Calculate similarity between query and training example."""
-        query_words = set(query.lower().split())
-        training_words = set(training_input.lower().split())
-        
-        if not query_words or not training_words:
-            return 0.0
-            
-        # Calculate Jaccard similarity
-        intersection = query_words.intersection(training_words)
-        union = query_words.union(training_words)
-        
-        return len(intersection) / len(union) if union else 0.0
+        return load_training()
     
-    def _find_best_training_match(self, query: str) -> Optional[Dict[str, Any]]:
-        """Find the best matching training example."""
+    def _build_index(self):
+        """Precompute word-presence and appliance-term matrices over the examples."""
+        inputs = [example.get('input', '').lower() for example in self.training_data]
+        self.vocab: Dict[str, int] = {}
+        rows, cols = [], []
+        for row, text in enumerate(inputs):
+            for word in set(text.split()):
+                rows.append(row)
+                cols.append(self.vocab.setdefault(word, len(self.vocab)))
+        self.tf = csr_matrix(
+            (np.ones(len(rows), dtype=np.int32), (rows, cols)),
+            shape=(len(inputs), len(self.vocab)),
+        )
+        self.row_sizes = np.diff(self.tf.indptr)
+        self.appliance_mask = np.array(
+            [[term in text for term in APPLIANCE_TERMS] for text in inputs],
+            dtype=np.float64,
+        ).reshape(len(inputs), len(APPLIANCE_TERMS))
+
+    def _find_best_training_match(self, query: str) -> Tuple[Optional[Dict[str, Any]], float]:
+        """Find the best matching training example and its word similarity."""
         if not self.training_data:
-            return None
-            
-        best_match = None
-        best_score = 0.0
-        
-        for example in self.training_data:
-            similarity = self._calculate_similarity(query, example.get('input', ''))
-            
-            # Boost similarity for key appliance terms
-            query_lower = query.lower()
-            input_lower = example.get('input', '').lower()
-            appliance_terms = {'refrigerator', 'fridge', 'dishwasher', 'washing', 'machine', 'dryer', 
-                             'cooling', 'cleaning', 'leaking', 'filter', 'light', 'bulb', 'water'}
+            return None, 0.0
             
-            appliance_boost = 0
-            for term in appliance_terms:
-                if term in query_lower and term in input_lower:
-                    appliance_boost += 0.15
-                    
-            final_similarity = similarity + appliance_boost
-            
-            # Lower threshold to 20% and include appliance boost
-            if final_similarity > 0.2 and final_similarity > best_score:
-                best_score = final_similarity
-                best_match = example
-                
-        return best_match
+        query_lower = query.lower()
+        query_words = set(query_lower.split())
+        q = np.zeros(len(self.vocab), dtype=np.int32)
+        q[[self.vocab[w] for w in query_words if w in self.vocab]] = 1
+
+        # Jaccard similarity against every example at once
+        intersection = self.tf @ q
+        union = self.row_sizes + len(query_words) - intersection
+        similarity = np.divide(
+            intersection, union, out=np.zeros(len(union)), where=union > 0
+        )
+
+        # Boost similarity for key appliance terms
+        query_terms = np.array([term in query_lower for term in APPLIANCE_TERMS], dtype=np.float64)
+        final_similarity = similarity + APPLIANCE_BOOST * (self.appliance_mask @ query_terms)
+
+        # Lower threshold to 20% and include appliance boost
+        best = int(np.argmax(final_similarity))
+        if final_similarity[best] > MATCH_THRESHOLD:
+            return self.training_data[best], float(similarity[best])
+        return None, 0.0
     
     def get_smart_response(self, query: str) -> str:
         """Get intelligent response using training data + enhanced fallback."""
         
         # First, try to find a relevant training example
-        best_match = self._find_best_training_match(query)
+        best_match, similarity = self._find_best_training_match(query)
         if best_match:
-            print(f"DEBUG: Using training data match (similarity: {self._calculate_similarity(query, best_match.get('input', '')):.2f})")
+            logger.debug("Using training data match (similarity: %.2f)", similarity)
             return best_match.get('output', '')
         
         # If no good match, use enhanced keyword-based responses
         query_lower = query.lower()
+        rule = _match_rule(query_lower)
         
         # Refrigerator issues
-        if any(word in query_lower for word in ['refrigerator', 'fridge', 'cooling', 'cold', 'temperature']):
+        if rule == 'refrigerator':
             if 'not cooling' in query_lower or 'warm' in query_lower:
                 return "For refrigerator cooling issues, check: 1) Temperature settings (should be 37-40°F), 2) Clean condenser coils (usually on back or bottom), 3) Door seals for gaps, 4) Frost buildup in freezer. If these don't help, you may need a new thermostat, evaporator fan, or compressor."
             elif 'leaking' in query_lower or 'water' in query_lower:
@@ -92,11 +122,11 @@ class SmartFallbackSystem:
                 return "I can help with refrigerator parts! Common issues include cooling problems, water leaks, faulty lights, and ice maker issues. Please describe your specific problem and provide your model number for accurate part recommendations."
         
         # Water filter queries
-        elif any(word in query_lower for word in ['water filter', 'filter']):
+        elif rule == 'filter':
             return "To find the right water filter: 1) Locate your refrigerator's model number (inside the fridge or on door frame), 2) Remove the old filter and check for part numbers, 3) Search for compatible filters using the model number. Most filters need replacement every 6 months."
         
         # Dishwasher issues
-        elif any(word in query_lower for word in ['dishwasher', 'dishes', 'washing']):
+        elif rule == 'dishwasher':
             if 'not cleaning' in query_lower or 'dirty' in query_lower:
                 return "For dishwasher cleaning issues: 1) Clean the filter (bottom of dishwasher), 2) Check spray arms for clogs, 3) Use proper detergent amount, 4) Don't overcrowd dishes. You may need new spray arms or wash pump motor."
             elif 'not draining' in query_lower or 'water' in query_lower:
@@ -105,15 +135,15 @@ class SmartFallbackSystem:
                 return "I can help with dishwasher parts! Common issues include poor cleaning, drainage problems, door seal leaks, and control panel failures. What specific problem are you experiencing?"
         
         # Installation help
-        elif any(word in query_lower for word in ['install', 'replace', 'how to', 'installation']):
+        elif rule == 'installation':
             return "For installation help, I need to know: 1) What part you're installing, 2) Your appliance model number, 3) What tools you have available. Most parts come with instructions, but I can provide specific guidance once I know the details."
         
         # Compatibility questions
-        elif any(word in query_lower for word in ['compatible', 'fit', 'work with']):
+        elif rule == 'compatibility':
             return "To check part compatibility, I need: 1) The exact part number, 2) Your appliance's complete model number. You can find the model number on a sticker inside your appliance or on the back/side panel."
         
         # General help
-        elif any(word in query_lower for word in ['help', 'hello', 'hi']):
+        elif rule == 'greeting':
             return "Hello! I specialize in appliance parts for dishwashers and refrigerators. I can help you find parts, check compatibility, and provide installation guidance. What appliance are you working on today?"
         
         # Default response
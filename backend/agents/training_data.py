@@ -0,0 +1,35 @@
+"""Shared loader for the example conversations used by the fallback agents.
+
+``SmartFallbackSystem`` and ``WorkingHuggingFaceAgent`` both match queries
+against the same training examples. The file is read and parsed once per
+process and the resulting list is shared, so constructing further agents
+costs nothing. Callers must treat the returned list as read-only.
+"""
+
+from __future__ import annotations
+
+import os
+from functools import lru_cache
+from typing import Any, Dict, List
+
+from .json_compat import load_file
+
+TRAINING_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), "data", "training_conversations.json"
+)
+
+
+@lru_cache(maxsize=1)
+def load_training(path: str = TRAINING_PATH) -> List[Dict[str, Any]]:
+    """Return the parsed training examples, or an empty list if unavailable."""
+    if os.path.exists(path):
+        try:
+            return load_file(path)
+        except Exception:
+            pass
+    return []
+
+
+def reload() -> None:
+    """Forget the cached examples so the next load reads the file again."""
+    load_training.cache_clear()
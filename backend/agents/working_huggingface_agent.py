@@ -1,10 +1,43 @@
 """Working HuggingFace agent with a proven model."""
 
 from __future__ import annotations
-from typing import Optional
-import torch
-import json
+import logging
 import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import List, Optional
+import numpy as np
+import torch
+
+from .training_data import load_training
+
+logger = logging.getLogger(__name__)
+
+# Words ignored when comparing a query with training examples
+COMMON_WORDS = frozenset({'the', 'a', 'an', 'is', 'are', 'my', 'i', 'to', 'from', 'in', 'on', 'at', 'with'})
+MATCH_THRESHOLD = 0.3
+
+# A generated reply must mention one of these to be used
+KEYWORDS = ("refrigerator", "dishwasher", "appliance", "part")
+
+# Concurrent generations arriving within MAX_WAIT seconds share one generate() call
+MAX_BATCH = 8
+MAX_WAIT = 0.01
+# Seconds a caller waits for its generation before giving up on the model
+GENERATE_TIMEOUT = 30.0
+
+# Opt-in graph compilation; it slows the first generation considerably
+TORCH_COMPILE = os.getenv("HF_TORCH_COMPILE", "").lower() in ("1", "true", "yes")
+
+if hasattr(np, "bitwise_count"):
+    _popcount = np.bitwise_count
+else:  # numpy < 2.0
+    _POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+    def _popcount(bits: np.ndarray) -> np.ndarray:
+        return _POPCOUNT_TABLE[bits]
 
 
 class WorkingHuggingFaceAgent:
@@ -23,82 +56,115 @@ class WorkingHuggingFaceAgent:
         self.model = None
         self.tokenizer = None
         self.device = torch.device("cpu")  # Keep simple for reliability
-        
-        # Load your training data for context
-        self.training_data = self._load_training_data()
-        
+        self._vocab = None
+        self._bitrows = None
+        self._row_sizes = None
+        self._pad_id = None
+        self._eos_id = None
+        self._requests: queue.Queue = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._worker_lock = threading.Lock()
+        self._load_lock = threading.Lock()
+
+    @property
+    def training_data(self):
+        """Training examples for context, loaded on first use like the model."""
+        return self._load_training_data()
+
     def _load_training_data(self):
         """Load your training examples for better responses."""
-        training_path = "data/training_conversations.json"
-        if os.path.exists(training_path):
-            try:
-                with open(training_path, 'r') as f:
-                    return json.load(f)
-            except:
-                pass
-        return []
+        return load_training()
         
     def _load_model(self):
         """Load model on first use."""
-        if self.model is None:
+        if self.model is not None:
+            return True
+        with self._load_lock:
+            if self.model is not None:
+                return True
             try:
                 from transformers import AutoModelForCausalLM, AutoTokenizer
                 
-                print(f"Loading proven model: {self.model_name}...")
-                self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
-                self.model = AutoModelForCausalLM.from_pretrained(
+                logger.info("Loading proven model: %s...", self.model_name)
+                tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+                model = AutoModelForCausalLM.from_pretrained(
                     self.model_name,
-                    torch_dtype=torch.float32,
+                    torch_dtype=self._model_dtype(),
                     low_cpu_mem_usage=True
                 )
                 
-                # Fix tokenizer padding
-                if self.tokenizer.pad_token is None:
-                    self.tokenizer.pad_token = self.tokenizer.eos_token
+                # Fix tokenizer padding; batched prompts are padded on the left
+                # so that generation continues directly after each prompt
+                if tokenizer.pad_token is None:
+                    tokenizer.pad_token = tokenizer.eos_token
+                tokenizer.padding_side = "left"
+                
+                model.to(self.device)
+                model.eval()
+                if TORCH_COMPILE and hasattr(torch, "compile"):
+                    # Compile the forward pass that generate() calls per token
+                    model.forward = torch.compile(model.forward, mode="reduce-overhead")
                 
-                self.model.to(self.device)
-                print("Model loaded successfully!")
+                self.tokenizer = tokenizer
+                self._pad_id = tokenizer.pad_token_id
+                self._eos_id = tokenizer.eos_token_id
+                # Published last: other threads treat a set model as ready to use
+                self.model = model
+                logger.info("Model loaded successfully!")
                 return True
             except Exception as e:
-                print(f"Failed to load model: {e}")
+                logger.warning("Failed to load model: %s", e)
                 return False
-        return True
     
+    @staticmethod
+    def _model_dtype() -> torch.dtype:
+        """Use bfloat16 on CPUs with native support, otherwise float32."""
+        bf16_supported = getattr(torch.cpu, "_is_avx512_bf16_supported", lambda: False)
+        return torch.bfloat16 if bf16_supported() else torch.float32
+
+    def _build_training_index(self) -> None:
+        """Pack each example's word presence into a row of bits over a shared vocabulary."""
+        word_sets = [set(example.get('input', '').lower().split()) - COMMON_WORDS
+                     for example in self.training_data]
+        vocab = {}
+        for words in word_sets:
+            for word in words:
+                vocab.setdefault(word, len(vocab))
+        presence = np.zeros((len(word_sets), len(vocab)), dtype=bool)
+        for row, words in enumerate(word_sets):
+            presence[row, [vocab[word] for word in words]] = True
+        self._bitrows = np.packbits(presence, axis=1)
+        self._row_sizes = presence.sum(axis=1)
+        self._vocab = vocab
+
     def _find_similar_training_example(self, query: str) -> Optional[str]:
         """Find similar training example to help with response."""
-        query_lower = query.lower()
+        if self._vocab is None:
+            self._build_training_index()
         best_match = None
         best_score = 0.0
-        
-        # Check for direct matches in training data
-        for example in self.training_data:
-            input_text = example.get('input', '').lower()
-            
-            # Calculate similarity score based on key words
-            query_words = set(query_lower.split())
-            input_words = set(input_text.split())
-            
-            # Remove common words
-            common_words = {'the', 'a', 'an', 'is', 'are', 'my', 'i', 'to', 'from', 'in', 'on', 'at', 'with'}
-            query_words = query_words - common_words
-            input_words = input_words - common_words
-            
-            if not query_words or not input_words:
-                continue
-                
-            # Calculate Jaccard similarity
-            intersection = query_words.intersection(input_words)
-            union = query_words.union(input_words)
-            similarity = len(intersection) / len(union) if union else 0.0
-            
-            # Require at least 30% similarity and must be better than previous matches
-            if similarity > 0.3 and similarity > best_score:
-                best_score = similarity
-                best_match = example.get('output', '')
+
+        # Remove common words
+        query_words = set(query.lower().split()) - COMMON_WORDS
+        if not query_words or not len(self._row_sizes):
+            return None
+
+        # Jaccard similarity against every example at once via bit counts
+        q = np.zeros(len(self._vocab), dtype=bool)
+        q[[self._vocab[w] for w in query_words if w in self._vocab]] = True
+        intersection = _popcount(self._bitrows & np.packbits(q)).sum(axis=1, dtype=np.int64)
+        union = self._row_sizes + len(query_words) - intersection
+        similarity = intersection / union
+
+        # Require at least 30% similarity and take the earliest best match
+        best = int(np.argmax(similarity))
+        if similarity[best] > MATCH_THRESHOLD:
+            best_score = float(similarity[best])
+            best_match = self.training_data[best].get('output', '')
         
         if best_match:
-            print(f"DEBUG: Found training match with similarity: {best_score:.2f}")
-            
+            logger.debug("Found training match with similarity: %.2f", best_score)
+
         return best_match
         
     def call(self, prompt: str) -> Optional[str]:
@@ -107,7 +173,7 @@ class WorkingHuggingFaceAgent:
         # First, check if we have a similar training example
         training_response = self._find_similar_training_example(prompt)
         if training_response:
-            print(f"DEBUG: Using training data response")
+            logger.debug("Using training data response")
             return training_response
         
         # Otherwise, use the model
@@ -118,47 +184,103 @@ class WorkingHuggingFaceAgent:
             # Create a conversational prompt
             conversation_prompt = f"Customer: {prompt}\\nAssistant:"
             
-            # Tokenize
-            inputs = self.tokenizer.encode(
-                conversation_prompt,
-                return_tensors="pt",
-                max_length=100,  # Keep short for DialoGPT-small
-                truncation=True
-            ).to(self.device)
-            
-            # Generate
-            with torch.no_grad():
-                outputs = self.model.generate(
-                    inputs,
-                    max_new_tokens=50,
-                    min_new_tokens=10,
-                    num_return_sequences=1,
-                    temperature=0.7,
-                    do_sample=True,
-                    pad_token_id=self.tokenizer.pad_token_id,
-                    eos_token_id=self.tokenizer.eos_token_id,
-                    early_stopping=True
-                )
-            
-            # Decode
-            full_response = self.tokenizer.decode(outputs[0], skip_special_tokens=True)
+            # Generate, batched with any concurrent requests; only the new
+            # tokens are decoded, so the reply needs no splitting off
+            response = self._generate(conversation_prompt)
+            if response is None:
+                return None
+            response = response.strip()
+            # Clean up
+            response = response.replace("Customer:", "").strip()
             
-            # Extract assistant response
-            if "Assistant:" in full_response:
-                response = full_response.split("Assistant:")[-1].strip()
-                # Clean up
-                response = response.replace("Customer:", "").strip()
-                
-                # Validate response quality
-                if len(response) > 10 and "refrigerator" in response.lower() or "dishwasher" in response.lower() or "appliance" in response.lower() or "part" in response.lower():
-                    return response
+            # Validate response quality
+            response_lower = response.lower()
+            if len(response) > 10 and any(keyword in response_lower for keyword in KEYWORDS):
+                return response
             
             return None
             
         except Exception as e:
-            print(f"Error generating response: {e}")
+            logger.warning("Error generating response: %s", e)
             return None
     
+    def warm_up(self) -> None:
+        """Build the training index and load the model ahead of the first call."""
+        if self._vocab is None:
+            self._build_training_index()
+        self._load_model()
+
+    def _generate(self, prompt: str) -> Optional[str]:
+        """Queue a prompt for the batching worker and wait for the generated text.
+
+        Returns ``None`` if no text arrives within ``GENERATE_TIMEOUT``
+        seconds, so a stuck generation cannot hold request threads forever.
+        """
+        with self._worker_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._batch_loop, name="hf-batcher", daemon=True)
+                self._worker.start()
+        future: Future = Future()
+        self._requests.put((prompt, future))
+        try:
+            return future.result(timeout=GENERATE_TIMEOUT)
+        except FutureTimeout:
+            # Still queued: the worker skips it. Already running: the result is dropped.
+            future.cancel()
+            logger.warning("Generation timed out after %g seconds", GENERATE_TIMEOUT)
+            return None
+
+    def _batch_loop(self) -> None:
+        """Collect queued prompts into batches and answer each one's future."""
+        while True:
+            batch = [self._requests.get()]
+            deadline = time.monotonic() + MAX_WAIT
+            while len(batch) < MAX_BATCH:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._requests.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            # Drop requests whose callers timed out while queued
+            batch = [(prompt, future) for prompt, future in batch if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                texts = self._generate_batch([prompt for prompt, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+            else:
+                for (_, future), text in zip(batch, texts):
+                    future.set_result(text)
+
+    def _generate_batch(self, prompts: List[str]) -> List[str]:
+        """Run one generate() call over several prompts and decode the continuations."""
+        inputs = self.tokenizer(
+            prompts,
+            return_tensors="pt",
+            padding=True,
+            max_length=100,  # Keep short for DialoGPT-small
+            truncation=True
+        ).to(self.device)
+        with torch.inference_mode():
+            outputs = self.model.generate(
+                **inputs,
+                max_new_tokens=50,
+                min_new_tokens=10,
+                num_return_sequences=1,
+                temperature=0.7,
+                do_sample=True,
+                pad_token_id=self._pad_id,
+                eos_token_id=self._eos_id,
+                early_stopping=True
+            )
+        # Prompts are left-padded to a common length, so new tokens start there
+        new_ids = outputs[:, inputs["input_ids"].shape[1]:]
+        return self.tokenizer.batch_decode(new_ids, skip_special_tokens=True)
+
     def is_available(self) -> bool:
         """Check if the agent can be used."""
         try:
@@ -11,12 +11,21 @@ authentication, session management, and message routing to appropriate agents.
 
 from __future__ import annotations
 
+import logging
 import os
+import threading
 from typing import Any, Dict, Optional
 
+from cachetools import LRUCache
 from flask import Flask, jsonify, request
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
 from orchestrator import Orchestrator
 from auth import (
     create_user,
@@ -25,12 +34,43 @@ from auth import (
     verify_token,
 )
 
+# Agents log through the logging module; DEBUG shows per-message details
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider that encodes and decodes request bodies with orjson.
+
+    Responses are serialised straight to bytes, skipping the intermediate
+    ``str`` that the standard provider builds.
+    """
+
+    _OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY if orjson else 0
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return orjson.dumps(obj, default=self.default, option=self._OPTIONS).decode()
+
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any) -> Any:
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=self.default, option=self._OPTIONS)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
 
 app = Flask(__name__)
+if orjson is not None:
+    app.json = OrjsonProvider(app)
+# Larger request bodies are rejected with 413 before they are read or parsed
+app.config["MAX_CONTENT_LENGTH"] = int(os.getenv("MAX_CONTENT_LENGTH", 64 * 1024))
 CORS(app)
 orchestrator = Orchestrator()
 
-sessions: Dict[str, Dict[str, Any]] = {}
+# Bounded so idle conversations are evicted instead of growing without limit;
+# the lock keeps access safe when the server runs with multiple threads
+sessions: LRUCache[str, Dict[str, Any]] = LRUCache(maxsize=int(os.getenv("SESSION_CACHE_MAX", "10000")))
+sessions_lock = threading.Lock()
 
 
 def _get_authenticated_user() -> Optional[str]:
@@ -49,6 +89,20 @@ def _get_authenticated_user() -> Optional[str]:
     return verify_token(token)
 
 
+def _get_json_body() -> Optional[Dict[str, Any]]:
+    """
+    Parse the request body as a JSON object.
+    
+    Returns
+    -------
+    Optional[Dict[str, Any]]
+        The decoded object, or None if the body is not valid JSON or is not
+        a JSON object.
+    """
+    data = request.get_json(force=True, silent=True)
+    return data if isinstance(data, dict) else None
+
+
 @app.route("/auth/register", methods=["POST"])
 def register() -> Any:
     """
@@ -65,7 +119,9 @@ def register() -> Any:
     Any
         JSON response containing authentication token or error message.
     """
-    data = request.get_json(force=True)
+    data = _get_json_body()
+    if data is None:
+        return jsonify({"error": "Request body must be a JSON object."}), 400
     username = data.get("username")
     password = data.get("password")
     if not username or not password:
@@ -92,7 +148,9 @@ def login() -> Any:
     Any
         JSON response containing authentication token or error message.
     """
-    data = request.get_json(force=True)
+    data = _get_json_body()
+    if data is None:
+        return jsonify({"error": "Request body must be a JSON object."}), 400
     username = data.get("username")
     password = data.get("password")
     if not username or not password:
@@ -124,14 +182,17 @@ def chat() -> Any:
     user = _get_authenticated_user()
     if not user:
         return jsonify({"error": "Unauthorized"}), 401
-    data = request.get_json(force=True)
+    data = _get_json_body()
+    if data is None:
+        return jsonify({"error": "Request body must be a JSON object."}), 400
     message: str = data.get("message", "")
     session_id: str = data.get("session_id", "default")
     if not message:
         return jsonify({"error": "Missing 'message' field."}), 400
     
     session_key = f"{user}:{session_id}"
-    context = sessions.setdefault(session_key, {})
+    with sessions_lock:
+        context = sessions.setdefault(session_key, {})
     result = orchestrator.handle_message(message, context)
     
     return jsonify(
@@ -164,10 +225,13 @@ def reset() -> Any:
     user = _get_authenticated_user()
     if not user:
         return jsonify({"error": "Unauthorized"}), 401
-    data = request.get_json(force=True)
+    data = _get_json_body()
+    if data is None:
+        return jsonify({"error": "Request body must be a JSON object."}), 400
     session_id: str = data.get("session_id", "default")
     session_key = f"{user}:{session_id}"
-    sessions.pop(session_key, None)
+    with sessions_lock:
+        sessions.pop(session_key, None)
     return jsonify({"status": "reset", "session_id": session_id})
 
 
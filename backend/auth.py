@@ -6,9 +6,25 @@ This module provides a lightweight authentication system using JSON Web Tokens
 user registration, password hashing with bcrypt, and token-based authentication.
 
 Security Features:
-- Password hashing using bcrypt with salt
+- Password hashing using bcrypt with salt, or Argon2id when configured
 - JWT tokens with configurable expiration
 - Secure token validation and verification
+- Verified tokens are cached briefly, never beyond their own expiry
+
+Password hashing cost is a deliberate trade-off: each bcrypt cost step
+doubles the work per login for both the server and an attacker. The default
+cost of 10 takes tens of milliseconds; set ``BCRYPT_COST`` to raise it (12 is
+the library default) or lower it for development. Setting
+``PASSWORD_SCHEME=argon2`` hashes new passwords with Argon2id instead, which
+needs the optional ``argon2-cffi`` package. Existing hashes of either kind
+keep verifying.
+
+Hashing runs on a small dedicated thread pool, and only a bounded number of
+hashes may be in flight at once, so a burst of logins queues instead of
+occupying every request thread with CPU-bound work. bcrypt releases the GIL
+while hashing, so the pool hashes in parallel. ``hash_password_async`` and
+``verify_password_async`` submit to the same pool directly, bounded by an
+``asyncio.Semaphore`` per event loop so waiting callers hold no thread.
 
 Note
 ----
@@ -18,20 +34,72 @@ Production deployments should integrate with a persistent database system.
 
 from __future__ import annotations
 
-import datetime
+import asyncio
+import hashlib
 import os
-from typing import Dict, Optional
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
 
 import bcrypt
 import jwt
+from cachetools import TLRUCache, TTLCache
+
+try:
+    from argon2 import PasswordHasher
+    from argon2.exceptions import InvalidHashError, VerificationError
+except ImportError:  # pragma: no cover - optional dependency
+    PasswordHasher = None
 
 
 JWT_SECRET = os.getenv("JWT_SECRET", "change_me")
 JWT_ALGORITHM = "HS256"
 JWT_EXP_DELTA_SECONDS = int(os.getenv("JWT_EXP_DELTA_SECONDS", "86400"))
 
+# One codec and key reused for every token; the key is pre-encoded so
+# PyJWT's per-call key preparation has nothing to convert
+_jwt = jwt.PyJWT()
+_jwt_key = JWT_SECRET.encode("utf-8")
+_jwt_algorithms = [JWT_ALGORITHM]
+
+BCRYPT_COST = int(os.getenv("BCRYPT_COST", "10"))
+PASSWORD_SCHEME = os.getenv("PASSWORD_SCHEME", "bcrypt").lower()
+
+_argon2 = (
+    PasswordHasher(time_cost=2, memory_cost=19456, parallelism=1)
+    if PasswordHasher is not None
+    else None
+)
+
+HASH_WORKERS = max(2, (os.cpu_count() or 2) // 2)
+_hash_pool = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="password-hash")
+# Hashes running or queued at once; further callers wait for a slot
+_hash_slots = threading.BoundedSemaphore(HASH_WORKERS * 2)
+# The asyncio equivalent; semaphores belong to one event loop, so one per loop
+_async_hash_slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+    weakref.WeakKeyDictionary()
+)
+
 USERS: Dict[str, bytes] = {}
 
+# Seconds a verified token is trusted without decoding it again
+TOKEN_CACHE_TTL = 30
+
+
+def _token_ttu(key: bytes, value: Tuple[str, float], now: float) -> float:
+    # Expire at the cache TTL or at the token's own expiry, whichever is first
+    return min(now + TOKEN_CACHE_TTL, value[1])
+
+
+_token_cache: TLRUCache = TLRUCache(maxsize=10_000, ttu=_token_ttu, timer=time.time)
+_token_cache_lock = threading.Lock()
+
+# Tokens issued for a user within the same second are identical, so reuse them
+_issued_tokens: TTLCache = TTLCache(maxsize=1024, ttl=15)
+_issued_tokens_lock = threading.Lock()
+
 
 def hash_password(password: str) -> bytes:
     """
@@ -45,9 +113,12 @@ def hash_password(password: str) -> bytes:
     Returns
     -------
     bytes
-        The bcrypt hashed password with salt.
+        The salted password hash: Argon2id if ``PASSWORD_SCHEME`` is
+        ``argon2`` and argon2-cffi is installed, otherwise bcrypt.
     """
-    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt())
+    if PASSWORD_SCHEME == "argon2" and _argon2 is not None:
+        return _argon2.hash(password).encode("ascii")
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(BCRYPT_COST))
 
 
 def verify_password(password: str, hashed: bytes) -> bool:
@@ -59,16 +130,52 @@ def verify_password(password: str, hashed: bytes) -> bool:
     password : str
         The plain text password to verify.
     hashed : bytes
-        The stored bcrypt hash to compare against.
+        The stored bcrypt or Argon2 hash to compare against.
     
     Returns
     -------
     bool
         True if the password matches the hash, False otherwise.
     """
+    if hashed.startswith(b"$argon2"):
+        if _argon2 is None:
+            return False
+        try:
+            return _argon2.verify(hashed.decode("ascii"), password)
+        except (VerificationError, InvalidHashError):
+            return False
     return bcrypt.checkpw(password.encode("utf-8"), hashed)
 
 
+# Verified against for unknown users. Hashed once at import, with the same
+# scheme and cost as real hashes, so every login pays exactly one verify.
+_DUMMY_HASH = hash_password(os.urandom(16).hex())
+
+
+def _run_hashing(func: Callable[..., Any], *args: Any) -> Any:
+    with _hash_slots:
+        return _hash_pool.submit(func, *args).result()
+
+
+async def _run_hashing_async(func: Callable[..., Any], *args: Any) -> Any:
+    loop = asyncio.get_running_loop()
+    slots = _async_hash_slots.get(loop)
+    if slots is None:
+        slots = _async_hash_slots[loop] = asyncio.Semaphore(HASH_WORKERS * 2)
+    async with slots:
+        return await loop.run_in_executor(_hash_pool, func, *args)
+
+
+async def hash_password_async(password: str) -> bytes:
+    """Hash a password on the hashing pool without blocking the event loop."""
+    return await _run_hashing_async(hash_password, password)
+
+
+async def verify_password_async(password: str, hashed: bytes) -> bool:
+    """Verify a password on the hashing pool without blocking the event loop."""
+    return await _run_hashing_async(verify_password, password, hashed)
+
+
 def create_user(username: str, password: str) -> bool:
     """
     Register a new user account.
@@ -87,7 +194,7 @@ def create_user(username: str, password: str) -> bool:
     """
     if username in USERS:
         return False
-    USERS[username] = hash_password(password)
+    USERS[username] = _run_hashing(hash_password, password)
     return True
 
 
@@ -107,9 +214,11 @@ def authenticate_user(username: str, password: str) -> bool:
     bool
         True if authentication succeeds, False otherwise.
     """
-    if username not in USERS:
-        return False
-    return verify_password(password, USERS[username])
+    # Unknown users are checked against a dummy hash so that the response
+    # time does not reveal whether the username exists
+    stored = USERS.get(username)
+    ok = _run_hashing(verify_password, password, stored if stored is not None else _DUMMY_HASH)
+    return ok and stored is not None
 
 
 def create_token(username: str) -> str:
@@ -126,13 +235,25 @@ def create_token(username: str) -> str:
     str
         A signed JWT token with expiration timestamp.
     """
-    now = datetime.datetime.utcnow()
+    # JWT timestamps have one-second resolution
+    issued_at = int(time.time())
+    key = (username, issued_at)
+    with _issued_tokens_lock:
+        token = _issued_tokens.get(key)
+    if token is None:
+        token = _encode_token(username, issued_at)
+        with _issued_tokens_lock:
+            _issued_tokens[key] = token
+    return token
+
+
+def _encode_token(username: str, issued_at: int) -> str:
     payload = {
         "sub": username,
-        "iat": now,
-        "exp": now + datetime.timedelta(seconds=JWT_EXP_DELTA_SECONDS),
+        "iat": issued_at,
+        "exp": issued_at + JWT_EXP_DELTA_SECONDS,
     }
-    return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
+    return _jwt.encode(payload, _jwt_key, algorithm=JWT_ALGORITHM)
 
 
 def verify_token(token: str) -> Optional[str]:
@@ -149,10 +270,20 @@ def verify_token(token: str) -> Optional[str]:
     Optional[str]
         The username if the token is valid, None if expired or invalid.
     """
+    key = hashlib.sha256(token.encode("utf-8")).digest()[:16]
+    with _token_cache_lock:
+        cached = _token_cache.get(key)
+    if cached is not None:
+        return cached[0]
     try:
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        return payload.get("sub")
+        payload = _jwt.decode(token, _jwt_key, algorithms=_jwt_algorithms)
     except jwt.ExpiredSignatureError:
         return None
     except jwt.InvalidTokenError:
-        return None
\ No newline at end of file
+        return None
+    username = payload.get("sub")
+    # Only successfully verified tokens are cached
+    if username is not None and "exp" in payload:
+        with _token_cache_lock:
+            _token_cache[key] = (username, float(payload["exp"]))
+    return username
\ No newline at end of file
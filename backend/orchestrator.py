@@ -12,10 +12,16 @@ installation guidance, compatibility checks, and general support.
 
 from __future__ import annotations
 
-from typing import Any, Dict, List
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
+from typing import Any, Dict, Optional
+
+from cachetools import TTLCache
 
 from agents.intent_classifier import IntentClassifier
-from agents.product_search_agent import ProductSearchAgent
+from agents.product_search_agent import ProductSearchAgent, get_product_agent
 from agents.compatibility_agent import CompatibilityAgent
 from agents.installation_agent import InstallationAgent
 from agents.order_support_agent import OrderSupportAgent
@@ -23,6 +29,10 @@ from agents.openai_agent import OpenAIAgent
 from agents.deepseek_agent import DeepSeekAgent
 from agents.working_huggingface_agent import WorkingHuggingFaceAgent
 from agents.smart_fallback import SmartFallbackSystem
+from agents.dispatch import first_answer
+from agents.history import append_message
+
+logger = logging.getLogger(__name__)
 
 
 class Orchestrator:
@@ -34,43 +44,112 @@ class Orchestrator:
     mechanisms to ensure reliable service availability.
     """
 
+    # Keywords confirming that a classified intent is specific enough to route.
+    # "how to install" and "installation guide" are covered by "install".
+    INSTALL_KEYWORDS = ("install", "replace part")
+    ORDER_KEYWORDS = ("order", "delivery", "shipping", "tracking")
+
+    # Agents whose construction needs no other agent, then those built from them
+    _INDEPENDENT_AGENTS = (
+        "product_agent", "openai_agent", "deepseek_agent",
+        "huggingface_agent", "smart_fallback", "order_support_agent",
+    )
+    _DEPENDENT_AGENTS = ("compatibility_agent", "installation_agent", "intent_classifier")
+
     def __init__(self) -> None:
         """
-        Initialize the orchestrator with all available agents and models.
+        Initialize the orchestrator; agents and models are created on first use.
         
-        Sets up the agent ecosystem including product search, compatibility checking,
+        The agent ecosystem covers product search, compatibility checking,
         installation guidance, and multiple AI models for general queries.
+        Each agent is built the first time a message needs it, so a worker
+        only pays for the agents its traffic actually reaches.
+        """
+        # Provider answers to general questions, keyed by normalised message
+        self._general_cache: TTLCache = TTLCache(maxsize=2048, ttl=3600)
+        self._general_cache_lock = threading.Lock()
+
+    def warm_up(self, max_workers: int = 4) -> None:
         """
-        self.product_agent = ProductSearchAgent(use_vector=True)
-        self.compatibility_agent = CompatibilityAgent(self.product_agent)
-        self.openai_agent = OpenAIAgent()
-        self.deepseek_agent = DeepSeekAgent()
+        Build every agent and its search indexes and models now instead of on first use.
         
+        The product vector store, the smart fallback index and the HuggingFace
+        model and training index load from disk or the network independently
+        of one another, so they are prepared in a thread pool and start-up
+        takes about as long as the slowest one. Agents that wrap others are
+        built once those are ready. Anything that fails to load is logged and
+        left to be built on first use, as without warming up.
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {name: executor.submit(self._prepare, name) for name in self._INDEPENDENT_AGENTS}
+            for name, future in futures.items():
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.warning("Could not warm up %s: %s", name, e)
+        for name in self._DEPENDENT_AGENTS:
+            getattr(self, name)
+
+    def _prepare(self, name: str) -> None:
+        agent = getattr(self, name)
+        # Constructors are cheap; the heavy parts are otherwise built lazily
+        if name == "product_agent":
+            agent.vector_store
+        elif name == "huggingface_agent" and agent and agent.is_available():
+            agent.warm_up()
+
+    @cached_property
+    def product_agent(self) -> ProductSearchAgent:
+        # Shared by every orchestrator so the process holds one search index
+        return get_product_agent()
+
+    @cached_property
+    def compatibility_agent(self) -> CompatibilityAgent:
+        return CompatibilityAgent(self.product_agent)
+
+    @cached_property
+    def openai_agent(self) -> OpenAIAgent:
+        return OpenAIAgent()
+
+    @cached_property
+    def deepseek_agent(self) -> DeepSeekAgent:
+        return DeepSeekAgent()
+
+    @cached_property
+    def huggingface_agent(self) -> Optional[WorkingHuggingFaceAgent]:
         try:
-            self.huggingface_agent = WorkingHuggingFaceAgent()
+            return WorkingHuggingFaceAgent()
         except Exception:
-            self.huggingface_agent = None
-            
-        self.smart_fallback = SmartFallbackSystem()
-        
+            return None
+
+    @cached_property
+    def smart_fallback(self) -> SmartFallbackSystem:
+        return SmartFallbackSystem()
+
+    @cached_property
+    def intent_classifier(self) -> Any:
         try:
             from agents.llm_intent_classifier import LLMIntentClassifier
             if self.openai_agent.api_key or self.deepseek_agent.api_key:
-                self.intent_classifier = LLMIntentClassifier(
+                return LLMIntentClassifier(
                     openai_agent=self.openai_agent,
                     deepseek_agent=self.deepseek_agent,
                 )
-            else:
-                self.intent_classifier = IntentClassifier()
+            return IntentClassifier()
         except Exception:
-            self.intent_classifier = IntentClassifier()
-            
-        self.installation_agent = InstallationAgent(
+            return IntentClassifier()
+
+    @cached_property
+    def installation_agent(self) -> InstallationAgent:
+        return InstallationAgent(
             product_agent=self.product_agent,
             openai_agent=self.openai_agent,
             deepseek_agent=self.deepseek_agent,
         )
-        self.order_support_agent = OrderSupportAgent()
+
+    @cached_property
+    def order_support_agent(self) -> OrderSupportAgent:
+        return OrderSupportAgent()
 
     def handle_message(self, message: str, context: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -96,24 +175,25 @@ class Orchestrator:
             - agent: Identifier of the agent that handled the request
             - intent: Classified intent category
         """
-        history: List[Dict[str, str]] = context.setdefault("history", [])
-        history.append({"role": "user", "content": message})
+        append_message(context, "user", message)
 
         intent_result = self.intent_classifier.handle(message, context)
         intent = intent_result.get("intent")
+        # Only the branch for the classified intent tests its keywords
+        contains = message.lower().__contains__
 
         if intent == "product_info":
             result = self.product_agent.handle(message, context)
         elif intent == "compatibility":
             result = self.compatibility_agent.handle(message, context)
-        elif intent == "installation" and any(word in message.lower() for word in ['install', 'replace part', 'how to install', 'installation guide']):
+        elif intent == "installation" and any(map(contains, self.INSTALL_KEYWORDS)):
             result = self.installation_agent.handle(message, context)
-        elif intent == "order_support" and any(word in message.lower() for word in ['order', 'delivery', 'shipping', 'tracking']):
+        elif intent == "order_support" and any(map(contains, self.ORDER_KEYWORDS)):
             result = self.order_support_agent.handle(message, context)
         else:
             result = self._handle_general_query(message)
 
-        history.append({"role": "assistant", "content": str(result.get("response"))})
+        append_message(context, "assistant", str(result.get("response")))
         return result
     
     def _handle_general_query(self, message: str) -> Dict[str, Any]:
@@ -122,6 +202,9 @@ class Orchestrator:
         
         Attempts to use AI models in priority order: OpenAI -> DeepSeek ->
         Smart Fallback -> HuggingFace, ensuring at least one response is provided.
+        OpenAI and DeepSeek are hedged rather than tried strictly in turn, so a
+        slow or failing OpenAI call does not add its full timeout. Their
+        answers are cached for an hour, so a repeated question skips them.
         
         Parameters
         ----------
@@ -133,19 +216,33 @@ class Orchestrator:
         Dict[str, Any]
             Response dictionary with generated answer and model identifier.
         """
+        key = " ".join(message.lower().split())
+        with self._general_cache_lock:
+            cached = self._general_cache.get(key)
+        if cached is not None:
+            return dict(cached)
+
         prompt = (
             "You are an assistant for an e‑commerce appliance parts site specializing in dishwashers and refrigerators. "
             "Answer the following question in a concise, friendly manner focusing on dishwasher and refrigerator parts only: "
             f"{message}"
         )
         
-        answer = self.openai_agent.call(prompt)
-        if answer and answer.strip() and "error" not in answer.lower():
-            return {"response": answer, "agent": "general_openai"}
-            
-        answer = self.deepseek_agent.call(prompt)
-        if answer and answer.strip() and "error" not in answer.lower():
-            return {"response": answer, "agent": "general_deepseek"}
+        winner = first_answer(
+            [
+                lambda: ("general_openai", self.openai_agent.call(prompt)),
+                lambda: ("general_deepseek", self.deepseek_agent.call(prompt)),
+            ],
+            accept=lambda result: bool(result[1] and result[1].strip() and "error" not in result[1].lower()),
+        )
+        if winner:
+            agent, answer = winner
+            result = {"response": answer, "agent": agent}
+            # Only provider answers are cached; local fallbacks are cheap and
+            # should not outlive a provider outage
+            with self._general_cache_lock:
+                self._general_cache[key] = result
+            return dict(result)
             
         answer = self.smart_fallback.get_smart_response(message)
         if answer and answer.strip() and len(answer) > 20:
@@ -2,57 +2,168 @@
 
 This module demonstrates how to integrate a vector database into the
 PartSelect chat agent without external dependencies such as FAISS or
-Weaviate. It uses scikit‑learn's TF‑IDF vectoriser and nearest-neighbour
-search to compute similarity between user queries and product documents.
+Weaviate. It uses scikit‑learn's TF‑IDF vectoriser to embed products and
+queries, and scores a query against every product with a single sparse
+matrix-vector product over the L2-normalised document matrix.
 
 In a production system you might replace this with a dedicated vector
 database (e.g., FAISS, Milvus, Pinecone, Weaviate) and use a more
 sophisticated embedding model (e.g., OpenAI embeddings). The API is
 designed to make swapping the backend straightforward.
+
+Setting ``VECTOR_BACKEND=embedding`` swaps in ``EmbeddingVectorStore``, which
+embeds products with a sentence-transformer model (``EMBEDDING_MODEL``) and
+searches them with an HNSW graph index. It needs the optional
+``sentence-transformers`` and ``hnswlib`` packages; without them, or when the
+model cannot be loaded, ``create_vector_store`` falls back to TF-IDF.
+
+Fitting the index is the expensive part of start-up, so the fitted vectoriser
+and document matrix are saved under ``VECTOR_CACHE_DIR`` (``backend/cache``
+by default), keyed by a hash of the catalogue file. Later processes load
+them instead of refitting until the catalogue changes; the embedding backend
+saves its embeddings and HNSW graph the same way. Saved arrays are
+memory-mapped rather than read, so start-up only pages in what queries touch,
+and a file lock ensures that concurrent workers fit a new index only once.
 """
 
 from __future__ import annotations
 
+import hashlib
 import json
+import logging
 import os
-from dataclasses import dataclass
-from typing import Any, Dict, List, Tuple
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
+import joblib
+import numpy as np
+import sklearn
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.neighbors import NearestNeighbors
+from sklearn.preprocessing import normalize
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+CACHE_DIR = os.getenv("VECTOR_CACHE_DIR", os.path.join(os.path.dirname(__file__), "cache"))
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "tfidf").lower()
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
 
+logger = logging.getLogger(__name__)
 
-@dataclass
-class Document:
-    """Represents a product document to be indexed."""
-    text: str
-    metadata: Dict[str, Any]
+
+def _compact(matrix: Any) -> Any:
+    """Return ``matrix`` as CSR with float32 values and int32 indices."""
+    # copy=False keeps memory-mapped arrays mapped when they are already compact
+    matrix = matrix.tocsr().astype(np.float32, copy=False)
+    if matrix.nnz < np.iinfo(np.int32).max:
+        matrix.indices = matrix.indices.astype(np.int32, copy=False)
+        matrix.indptr = matrix.indptr.astype(np.int32, copy=False)
+    return matrix
+
+
+# Catalogue fields joined, in order, into each product's indexed text
+_TEXT_FIELDS = ("name", "description", "instructions", "installation")
 
 
 class VectorStore:
-    """In‑memory vector store using TF‑IDF and nearest neighbours."""
+    """In‑memory vector store using TF‑IDF and cosine similarity."""
 
     def __init__(self, product_file: str) -> None:
         self.product_file = product_file
-        self.documents: List[Document] = []
-        self.vectorizer = TfidfVectorizer(stop_words="english")
-        self.nn: NearestNeighbors | None = None
+        # Parallel lists: row i of the index is texts[i], returned as metadata[i]
+        self.texts: List[str] = []
+        self.metadata: List[Dict[str, Any]] = []
+        # Fitted by _build_index or restored from the cache
+        self.vectorizer: Optional[TfidfVectorizer] = None
+        self.matrix = None
+        self.catalogue_hash = ""
         self._load_products()
-        self._build_index()
+        if not self._load_cached_index():
+            with self._build_lock():
+                # Another worker may have saved the index while we waited
+                if not self._load_cached_index():
+                    self._build_index()
+                    self._save_index()
+        # Repeated queries skip vectorising and scoring; queries are lowercased
+        # like the catalogue texts, so case and surrounding space do not matter
+        self._query_cached = lru_cache(maxsize=4096)(self._query)
 
     def _load_products(self) -> None:
-        with open(self.product_file, "r", encoding="utf-8") as f:
-            products = json.load(f)
-        for p in products:
-            text_parts: List[str] = [p.get("name", ""), p.get("description", ""), p.get("instructions", ""), p.get("installation", "")]
-            text = "\n".join([t for t in text_parts if t])
-            self.documents.append(Document(text=text, metadata=p))
+        with open(self.product_file, "rb") as f:
+            raw = f.read()
+        # The scikit-learn version is part of the key since pickles are version-specific
+        digest = hashlib.sha1(raw)
+        digest.update(sklearn.__version__.encode())
+        self.catalogue_hash = digest.hexdigest()[:16]
+        self.metadata = json.loads(raw)
+        self.texts = [
+            "\n".join(filter(None, map(p.get, _TEXT_FIELDS))).lower()
+            for p in self.metadata
+        ]
 
     def _build_index(self) -> None:
-        corpus = [doc.text for doc in self.documents]
-        self.matrix = self.vectorizer.fit_transform(corpus)
-        self.nn = NearestNeighbors(n_neighbors=min(5, len(self.documents)), metric="cosine")
-        self.nn.fit(self.matrix)
+        # float32 halves the bytes moved by each query's sparse product; texts
+        # and queries are lowercased before they reach the vectoriser
+        self.vectorizer = TfidfVectorizer(stop_words="english", lowercase=False, dtype=np.float32)
+        # Rows are unit length, so a dot product with a normalised query is its cosine similarity
+        matrix = normalize(self.vectorizer.fit_transform(self.texts), norm="l2", axis=1)
+        self.matrix = _compact(matrix)
+
+    def _cache_path(self) -> Optional[str]:
+        if not self.catalogue_hash:
+            return None
+        return os.path.join(CACHE_DIR, f"tfidf_{self.catalogue_hash}.joblib")
+
+    @contextmanager
+    def _build_lock(self) -> Iterator[None]:
+        """Hold an exclusive lock on this catalogue's cache entry, if possible."""
+        path = self._cache_path()
+        lock_file = None
+        if fcntl is not None and path:
+            try:
+                os.makedirs(CACHE_DIR, exist_ok=True)
+                lock_file = open(f"{path}.lock", "w")
+            except OSError:
+                lock_file = None
+        if lock_file is None:
+            yield
+            return
+        with lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _load_cached_index(self) -> bool:
+        """Restore a previously fitted index for this catalogue, if saved."""
+        path = self._cache_path()
+        if not path or not os.path.exists(path):
+            return False
+        try:
+            self.vectorizer, matrix = joblib.load(path, mmap_mode="r")
+        except Exception:
+            # A corrupt or incompatible cache is simply rebuilt
+            return False
+        self.matrix = _compact(matrix)
+        return True
+
+    def _save_index(self) -> None:
+        path = self._cache_path()
+        if not path:
+            return
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            joblib.dump((self.vectorizer, self.matrix), tmp_path)
+            # Atomic so concurrent workers never read a partial file
+            os.replace(tmp_path, path)
+        except OSError:
+            # Caching is an optimisation; a read-only disk must not break search
+            pass
 
     def query(self, text: str, top_k: int = 3) -> List[Tuple[float, Dict[str, Any]]]:
         """Return the top_k most similar documents to the query text.
@@ -64,14 +175,140 @@ class VectorStore:
         Returns:
             A list of tuples of (similarity score, product metadata).
         """
-        if self.nn is None:
-            return []
-        query_vec = self.vectorizer.transform([text])
-        distances, indices = self.nn.kneighbors(query_vec, n_neighbors=top_k)
-        results: List[Tuple[float, Dict[str, Any]]] = []
-        for dist, idx in zip(distances[0], indices[0]):
-            # convert cosine distance to similarity (1 - distance)
-            similarity = 1.0 - dist
-            meta = self.documents[idx].metadata
-            results.append((similarity, meta))
-        return results
\ No newline at end of file
+        return list(self._query_cached(text.lower().strip(), top_k))
+
+    def _query(self, text: str, top_k: int) -> Tuple[Tuple[float, Dict[str, Any]], ...]:
+        if self.matrix is None or top_k <= 0:
+            return ()
+        query_vec = normalize(self.vectorizer.transform([text]), norm="l2", axis=1)
+        sims = (self.matrix @ query_vec.T).toarray().ravel()
+        top_k = min(top_k, len(sims))
+        if top_k < len(sims):
+            candidates = np.argpartition(-sims, top_k - 1)[:top_k]
+        else:
+            candidates = np.arange(len(sims))
+        # Highest similarity first; ties keep catalogue order
+        order = candidates[np.argsort(-sims[candidates], kind="stable")]
+        return tuple((float(sims[idx]), self.metadata[idx]) for idx in order)
+
+
+class EmbeddingVectorStore(VectorStore):
+    """Vector store using sentence-transformer embeddings and an HNSW index."""
+
+    def __init__(self, product_file: str) -> None:
+        # Raise ImportError up front when the optional packages are missing
+        import hnswlib
+        from sentence_transformers import SentenceTransformer
+
+        self._hnswlib = hnswlib
+        self.model = SentenceTransformer(EMBEDDING_MODEL)
+        self.embeddings: Optional[np.ndarray] = None
+        self.index = None
+        super().__init__(product_file)
+
+    def _build_index(self) -> None:
+        # One batched pass over the catalogue; unit vectors make cosine a dot product
+        self.embeddings = self.model.encode(
+            self.texts,
+            batch_size=64,
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+            show_progress_bar=False,
+        ).astype(np.float32)
+        self._build_graph()
+
+    def _build_graph(self) -> None:
+        self.index = self._hnswlib.Index(space="cosine", dim=self.embeddings.shape[1])
+        self.index.init_index(max_elements=max(1, len(self.embeddings)), M=16, ef_construction=100)
+        self.index.add_items(self.embeddings)
+
+    def _graph_path(self) -> Optional[str]:
+        path = self._cache_path()
+        return path and f"{path[:-len('.npy')]}.hnsw"
+
+    def _load_graph(self) -> bool:
+        """Restore the saved HNSW graph built from the cached embeddings."""
+        path = self._graph_path()
+        if not path or not os.path.exists(path):
+            return False
+        try:
+            index = self._hnswlib.Index(space="cosine", dim=self.embeddings.shape[1])
+            index.load_index(path, max_elements=max(1, len(self.embeddings)))
+        except Exception:
+            return False
+        self.index = index
+        return True
+
+    def _cache_path(self) -> Optional[str]:
+        if not self.catalogue_hash:
+            return None
+        model = EMBEDDING_MODEL.replace("/", "_")
+        return os.path.join(CACHE_DIR, f"embeddings_{self.catalogue_hash}_{model}.npy")
+
+    def _load_cached_index(self) -> bool:
+        """Restore saved embeddings for this catalogue and rebuild the graph."""
+        path = self._cache_path()
+        if not path or not os.path.exists(path):
+            return False
+        try:
+            self.embeddings = np.load(path, mmap_mode="r")
+        except Exception:
+            return False
+        if not self._load_graph():
+            # Older caches hold only the embeddings; save the graph built now
+            self._build_graph()
+            self._save_graph()
+        return True
+
+    def _save_index(self) -> None:
+        path = self._cache_path()
+        if not path:
+            return
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                np.save(f, self.embeddings)
+            os.replace(tmp_path, path)
+        except OSError:
+            return
+        self._save_graph()
+
+    def _save_graph(self) -> None:
+        path = self._graph_path()
+        if not path:
+            return
+        try:
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            self.index.save_index(tmp_path)
+            os.replace(tmp_path, path)
+        except (OSError, RuntimeError):
+            pass
+
+    def _query(self, text: str, top_k: int) -> Tuple[Tuple[float, Dict[str, Any]], ...]:
+        if self.index is None or top_k <= 0 or not self.metadata:
+            return ()
+        top_k = min(top_k, len(self.metadata))
+        self.index.set_ef(max(50, top_k))
+        query_vec = self.model.encode([text], normalize_embeddings=True, convert_to_numpy=True)
+        labels, distances = self.index.knn_query(query_vec, k=top_k)
+        # hnswlib reports cosine distance; convert to similarity (1 - distance)
+        return tuple(
+            (1.0 - float(dist), self.metadata[idx])
+            for idx, dist in zip(labels[0], distances[0])
+        )
+
+
+def create_vector_store(product_file: str) -> VectorStore:
+    """Build the vector store selected by ``VECTOR_BACKEND``.
+
+    Falls back to the TF-IDF store when the embedding backend cannot be used,
+    e.g. its optional dependencies are not installed or the model fails to
+    download or load.
+    """
+    if VECTOR_BACKEND == "embedding":
+        try:
+            return EmbeddingVectorStore(product_file)
+        except Exception as e:
+            logger.warning("Embedding vector store unavailable, using TF-IDF: %s", e)
+    return VectorStore(product_file)
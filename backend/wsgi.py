@@ -0,0 +1,18 @@
+"""
+WSGI entry point for running the backend under a production server.
+
+Example:
+    gunicorn -k gthread --threads 8 -b 0.0.0.0:5001 wsgi:application
+
+Set ``WARM_UP_AGENTS=1`` to build every agent while the worker starts rather
+than on the first request that needs each one.
+"""
+
+import os
+
+from app import app, orchestrator
+
+if os.getenv("WARM_UP_AGENTS", "").lower() in ("1", "true", "yes"):
+    orchestrator.warm_up()
+
+application = app